@@ -157,3 +157,14 @@ REST_FRAMEWORK = {
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
+
+# cache for authenticated API tokens, local memory is per process so
+# each uWSGI worker keeps its own copy and only the worker that deletes
+# a token or deactivates a user drops it straight away
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+# seconds a token is trusted before it's looked up in the database again
+TOKEN_CACHE_TIMEOUT = 30
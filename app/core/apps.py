@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # keep the cached token authentication in sync with the database
+        from rest_framework.authtoken.models import Token
+        from core.authentication import (
+            clear_cached_token,
+            clear_cached_user_tokens,
+        )
+
+        post_delete.connect(clear_cached_token, sender=Token)
+        post_save.connect(clear_cached_user_tokens, sender='core.User')
@@ -0,0 +1,54 @@
+"""
+Authentication for the APIs.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def token_cache_key(key):
+    """Return the cache key for an auth token."""
+    # hash the token so the raw key isn't stored in the cache
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token lookup.
+
+    The cache is the per-process local memory cache configured in
+    settings, so deleting a token or deactivating a user only clears
+    the entry in the process that made the change. Other processes keep
+    accepting it for up to TOKEN_CACHE_TIMEOUT seconds.
+    """
+
+    def authenticate_credentials(self, key):
+        """Return the user and token for key, cached for a short time."""
+        cache_key = token_cache_key(key)
+        credentials = cache.get(cache_key)
+        if credentials is None:
+            # invalid tokens and inactive users raise here so only
+            # valid credentials get cached
+            credentials = super().authenticate_credentials(key)
+            cache.set(cache_key, credentials, settings.TOKEN_CACHE_TIMEOUT)
+
+        return credentials
+
+
+def clear_cached_token(sender, instance, **kwargs):
+    """Stop accepting a cached token once it's deleted (e.g. logout)."""
+    cache.delete(token_cache_key(instance.key))
+
+
+def clear_cached_user_tokens(sender, instance, **kwargs):
+    """Drop cached tokens of a saved user (e.g. deactivated)."""
+    # a user that was just created can't have a token yet
+    if kwargs.get('created'):
+        return
+
+    keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+    cache.delete_many(
+        [token_cache_key(key) for key in keys]
+    )
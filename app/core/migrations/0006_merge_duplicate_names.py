@@ -0,0 +1,45 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags and ingredients a user has more than once by name."""
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, relation in (('Tag', 'tags'), ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, relation).through
+        field = f'{model_name.lower()}_id'
+        duplicates = model.objects.values('user', 'name').annotate(
+            count=Count('id'),
+            keep_id=Min('id'),
+        ).filter(count__gt=1)
+        for duplicate in duplicates:
+            extra_ids = model.objects.filter(
+                user=duplicate['user'],
+                name=duplicate['name'],
+            ).exclude(id=duplicate['keep_id']).values_list('id', flat=True)
+            # link the recipes of the duplicates to the kept row, the
+            # duplicates' own links are deleted along with them
+            recipe_ids = through.objects.filter(
+                **{f'{field}__in': extra_ids},
+            ).values_list('recipe_id', flat=True).distinct()
+            for recipe_id in recipe_ids:
+                through.objects.get_or_create(
+                    recipe_id=recipe_id,
+                    **{field: duplicate['keep_id']},
+                )
+            model.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recipe_image'),
+    ]
+
+    operations = [
+        # a separate migration from the unique constraints, postgres
+        # can't ALTER a table with pending deferred FK checks from the
+        # deletes in the same transaction
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+    ]
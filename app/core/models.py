@@ -74,6 +74,12 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
 
+    class Meta:
+        # recipes are listed per user, newest first
+        indexes = [
+            models.Index(fields=['user', '-id'], name='recipe_user_id_idx'),
+        ]
+
     # specify the string representation of that object
     def __str__(self):
         return self.title
@@ -87,6 +93,15 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        # one tag per name for each user, also used to list by name
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user',
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -99,5 +114,14 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        # one ingredient per name for each user, also used to list by name
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_ingredient_name_per_user',
+            ),
+        ]
+
     def __str__(self):
         return self.name
@@ -3,6 +3,7 @@ Tests for models.
 """
 from unittest.mock import patch
 from decimal import Decimal
+from django.db import IntegrityError
 from django.test import TestCase
 
 # get reference to customized user model
@@ -81,6 +82,14 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(tag), tag.name)
 
+    def test_create_duplicate_tag_raises_error(self):
+        """Test creating a tag with a name the user already has fails."""
+        user = create_user()
+        models.Tag.objects.create(user=user, name='Tag1')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='Tag1')
+
     def test_create_ingredient(self):
         """Test creating an ingredient is successful."""
         user = create_user()
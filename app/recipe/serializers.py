@@ -1,6 +1,7 @@
 """
 Serializers for recipe APIs
 """
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
 from core.models import (
@@ -10,25 +11,76 @@ from core.models import (
 )
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+# maximum number of rows sent in a single INSERT when linking
+# tags and ingredients to a recipe
+M2M_BATCH_SIZE = 1000
+
+
+class CachedFieldNamesMixin:
+    """Resolve the field names of a model serializer once per class."""
+
+    def get_field_names(self, declared_fields, info):
+        """Return the field names, cached on the serializer class."""
+        cls = type(self)
+        # look in the class's own __dict__ so a subclass doesn't reuse
+        # the field names cached by its parent
+        field_names = cls.__dict__.get('_field_names')
+        if field_names is None:
+            field_names = tuple(
+                super().get_field_names(declared_fields, info)
+            )
+            cls._field_names = field_names
+
+        return field_names
+
+
+class UniqueNamePerUserMixin:
+    """Reject names the user already has for another item."""
+
+    def validate_name(self, value):
+        """Validate the name is unique for the authenticated user."""
+        # nested in a recipe, an existing name means reusing that item
+        if self.parent is not None:
+            return value
+
+        queryset = self.Meta.model.objects.filter(
+            user=self.context['request'].user,
+            name=value,
+        )
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        if queryset.exists():
+            raise serializers.ValidationError(
+                f'You already have a {self.Meta.model._meta.verbose_name} '
+                'with this name.'
+            )
+
+        return value
+
+
+class IngredientSerializer(UniqueNamePerUserMixin,
+                           CachedFieldNamesMixin,
+                           serializers.ModelSerializer):
     """Serializer for ingredients."""
 
     class Meta:
         model = Ingredient
-        fields = ['id', 'name']
-        read_only_fields = ['id']
+        fields = ('id', 'name')
+        read_only_fields = ('id',)
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(UniqueNamePerUserMixin,
+                    CachedFieldNamesMixin,
+                    serializers.ModelSerializer):
     """Serializer for tags."""
 
     class Meta:
         model = Tag
-        fields = ['id', 'name']
-        read_only_fields = ['id']
+        fields = ('id', 'name')
+        read_only_fields = ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(CachedFieldNamesMixin, serializers.ModelSerializer):
     """Serializer for recipes."""
     # can be a list of tags and tag is not requried
     tags = TagSerializer(many=True, required=False)
@@ -36,43 +88,94 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = [
+        fields = (
             'id', 'title', 'time_minutes', 'price', 'link', 'tags',
             'ingredients',
-        ]  # fields that can be seen in serializer
-        read_only_fields = ['id']
+        )  # fields that can be seen in serializer
+        read_only_fields = ('id',)
+
+    def _bulk_get_or_create(self, model, items, auth_user):
+        """Return objects of model for items, creating missing ones."""
+        # dict.fromkeys drops duplicate names while keeping their order
+        names = list(dict.fromkeys(item['name'] for item in items))
+        if not names:
+            return []
+
+        # one SELECT for every name that already exists for the user
+        existing = {
+            obj.name: obj
+            for obj in model.objects.filter(user=auth_user, name__in=names)
+        }
+        missing = [name for name in names if name not in existing]
+        if missing:
+            objs = [model(user=auth_user, name=name) for name in missing]
+            try:
+                # one INSERT for all the new names, postgres returns
+                # their primary keys so no follow-up SELECT is needed
+                with transaction.atomic():
+                    model.objects.bulk_create(objs)
+            except IntegrityError:
+                # another request created some of the names in the
+                # meantime, insert the rest and fetch them all, since
+                # ignore_conflicts doesn't set the primary keys
+                model.objects.bulk_create(objs, ignore_conflicts=True)
+                objs = model.objects.filter(user=auth_user, name__in=missing)
+            existing.update((obj.name, obj) for obj in objs)
 
-    def _get_or_create_tags(self, tags, recipe):
+        return [existing[name] for name in names]
+
+    def _attach(self, recipe, relation, objs):
+        """Link objs to recipe through the many to many table."""
+        manager = getattr(recipe, relation)
+        through = manager.through
+        links = [
+            through(**{
+                manager.source_field_name: recipe,
+                manager.target_field_name: obj,
+            })
+            for obj in objs
+        ]
+        # write the links straight to the through table in batches,
+        # skipping the SELECT add() does to find existing links
+        through.objects.bulk_create(
+            links,
+            batch_size=M2M_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    def _sync(self, recipe, relation, objs):
+        """Make objs the only objects linked to recipe by relation."""
+        manager = getattr(recipe, relation)
+        current_ids = set(manager.values_list('id', flat=True))
+        new_objs = {obj.id: obj for obj in objs}
+        # only write the links that changed instead of clearing and
+        # re-adding them, so an unchanged list doesn't touch the table
+        self._attach(recipe, relation, [
+            obj for obj_id, obj in new_objs.items()
+            if obj_id not in current_ids
+        ])
+        remove_ids = current_ids - new_objs.keys()
+        if remove_ids:
+            manager.remove(*remove_ids)
+
+    def _get_or_create_tags(self, tags, auth_user):
         """Handle getting or creating tags as needed."""
-        # context is passed to the serializer by the view
-        auth_user = self.context['request'].user
-        # loops through all the tags we poped from the validated data
-        for tag in tags:
-            # retrieve the tags if already existed in the database
-            # for authenticated userif not existed, create a value with
-            # the value we passed in so we won't get duplicate tags
-            # created: true or false; if being created or fetched
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
+        # retrieve the tags if already existed in the database
+        # for authenticated user, if not existed, create them with
+        # the values we passed in so we won't get duplicate tags
+        return self._bulk_get_or_create(Tag, tags, auth_user)
 
     # _ means the method to be internal only so that won't
     # be accidentally make call to it directly
-    def _get_or_create_ingredients(self, ingredients, recipe):
+    def _get_or_create_ingredients(self, ingredients, auth_user):
         """Handle getting or creating ingredients as needed."""
-        auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            # get existing ingredients from or
-            # create new ingredients in the database
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
-            )
-            # assign ingredients to the ingredients list
-            recipe.ingredients.add(ingredient_obj)
+        # get existing ingredients from or
+        # create new ingredients in the database
+        return self._bulk_get_or_create(Ingredient, ingredients, auth_user)
 
+    # run the recipe and its tags and ingredients writes in one
+    # transaction so they are committed together
+    @transaction.atomic
     def create(self, validated_data):
         """Create a recipe."""
         # if tags are existed in the validated data and then
@@ -83,32 +186,53 @@ class RecipeSerializer(serializers.ModelSerializer):
         ingredients = validated_data.pop('ingredients', [])
         # remove the tags before created the recipe
         recipe = Recipe.objects.create(**validated_data)
+        # context is passed to the serializer by the view, resolve
+        # the user once and share it between both helpers
+        auth_user = self.context['request'].user
         # tags is a related field and is expected
         # to be created separately
         # and added as a relationship to recipe
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        self._attach(
+            recipe,
+            'tags',
+            self._get_or_create_tags(tags, auth_user),
+        )
+        self._attach(
+            recipe,
+            'ingredients',
+            self._get_or_create_ingredients(ingredients, auth_user),
+        )
         return recipe
 
     # override the update function to allow creating new objects in the field
     # the existing instance and validated data that we want to pass to
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update recipe."""
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
+        auth_user = self.context['request'].user
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            self._sync(
+                instance,
+                'tags',
+                self._get_or_create_tags(tags, auth_user),
+            )
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            self._sync(
+                instance,
+                'ingredients',
+                self._get_or_create_ingredients(ingredients, auth_user),
+            )
 
         # assign the values outside of tags to the instance
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        instance.save()
+        # only UPDATE the columns that changed, an empty list
+        # (e.g. a PATCH of just the tags) skips the save entirely
+        instance.save(update_fields=list(validated_data))
         return instance
 
 
@@ -118,14 +242,23 @@ class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for recipe detail view."""
 
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ['description', 'image']
+        fields = RecipeSerializer.Meta.fields + ('description', 'image')
 
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class RecipeImageSerializer(CachedFieldNamesMixin,
+                            serializers.ModelSerializer):
     """Serializer for uploading images to recipes."""
 
     class Meta:
         model = Recipe
-        fields = ['id', 'image']
-        read_only_fields = ['id']
+        fields = ('id', 'image')
+        read_only_fields = ('id',)
         extra_kwargs = {'image': {'required': 'True'}}
+
+    def update(self, instance, validated_data):
+        """Update and return recipe with the uploaded image."""
+        instance.image = validated_data['image']
+        # the file is written to storage while saving, keep the
+        # UPDATE itself limited to the image column
+        instance.save(update_fields=['image'])
+        return instance
@@ -88,6 +88,19 @@ class PrivateIngredientsApiTests(TestCase):
         ingredient.refresh_from_db()
         self.assertEqual(ingredient.name, payload['name'])
 
+    def test_update_ingredient_duplicate_name_error(self):
+        """Test renaming a ingredient to a name the user already has fails."""
+        Ingredient.objects.create(user=self.user, name='Salt')
+        ingredient = Ingredient.objects.create(user=self.user, name='Pepper')
+
+        payload = {'name': 'Salt'}
+        url = detail_url(ingredient.id)
+        res = self.client.patch(url, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        ingredient.refresh_from_db()
+        self.assertEqual(ingredient.name, 'Pepper')
+
     def test_delete_ingredient(self):
         """Test deleting an ingredient."""
         ingredient = Ingredient.objects.create(user=self.user, name='Lettuce')
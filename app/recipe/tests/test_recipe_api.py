@@ -112,6 +112,22 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_retrieve_recipes_with_tags_and_ingredients(self):
+        """Test listing recipes includes their tags and ingredients."""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Tofu'),
+        )
+        create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL)
+
+        recipes = Recipe.objects.all().order_by('-id')
+        serializer = RecipeSerializer(recipes, many=True)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, serializer.data)
+
     def test_get_recipe_detail(self):
         """Test get recipe detail."""
         recipe = create_recipe(user=self.user)
@@ -285,6 +301,24 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(recipe.tags.count(), 1)
         self.assertNotIn(tag_halal, recipe.tags.all())
 
+    def test_create_recipe_with_duplicate_tags(self):
+        """Test duplicate tag names in a payload create one tag."""
+        payload = {
+            'title': 'Pad Thai',
+            'time_minutes': 25,
+            'price': Decimal('6.50'),
+            'tags': [{'name': 'Thai'}, {'name': 'Thai'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 1)
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name='Thai').count(),
+            1,
+        )
+
     def test_create_tag_on_update(self):
         """Test create tag when updating a recipe."""
         recipe = create_recipe(user=self.user)
@@ -316,6 +350,29 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(tag_lunch, recipe.tags.all())
         self.assertNotIn(tag_breakfast, recipe.tags.all())
 
+    def test_update_recipe_keeps_unchanged_tags(self):
+        """Test updating a recipe with its current tags keeps them."""
+        tag_breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag_breakfast)
+        link = Recipe.tags.through.objects.get(
+            recipe=recipe,
+            tag=tag_breakfast,
+        )
+
+        payload = {'tags': [{'name': 'Breakfast'}, {'name': 'Brunch'}]}
+        url = detail_url(recipe.id)
+        res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # the existing link is kept instead of deleted and re-created
+        self.assertTrue(
+            Recipe.tags.through.objects.filter(id=link.id).exists()
+        )
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertIn(tag_breakfast, recipe.tags.all())
+        self.assertTrue(recipe.tags.filter(name='Brunch').exists())
+
     def test_clear_recipe_tags(self):
         """Test clearing a recipes tags."""
         tag = Tag.objects.create(user=self.user, name='Dessert')
@@ -455,6 +512,23 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(s2.data, res.data)
         self.assertNotIn(s3.data, res.data)
 
+    def test_filter_by_empty_tags(self):
+        """Test filtering by only empty tag IDs doesn't filter recipes."""
+        r1 = create_recipe(user=self.user, title='Fish and chips')
+        r2 = create_recipe(user=self.user, title='Red Lentil Daal')
+
+        res = self.client.get(RECIPES_URL, {'tags': ','})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(RecipeSerializer(r1).data, res.data)
+        self.assertIn(RecipeSerializer(r2).data, res.data)
+
+    def test_filter_by_invalid_tags_error(self):
+        """Test filtering recipes by a non-numeric tag ID fails."""
+        res = self.client.get(RECIPES_URL, {'tags': '1,x'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class ImageUploadTests(TestCase):
     """Tests for the image upload API."""
@@ -1,21 +1,25 @@
 """
 Views for the recipe APIs
 """
+from collections import defaultdict
+
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
     OpenApiParameter,
     OpenApiTypes,
 )
+from django.db.models import Exists, OuterRef
 from rest_framework import (
     viewsets,
     mixins,  # mix in to a view to add additional functionality
     status,
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from core.authentication import CachedTokenAuthentication
 from core.models import (
     Recipe,
     Tag,
@@ -24,6 +28,10 @@ from core.models import (
 from recipe import serializers
 
 
+# recipe columns rendered by the list endpoint
+RECIPE_LIST_FIELDS = ('id', 'title', 'time_minutes', 'price', 'link')
+
+
 # extend the auto-generated schema created by Django Rest Spectacular
 @extend_schema_view(
     # extend the schema for the list endpoint (where we add filters to)
@@ -47,18 +55,40 @@ from recipe import serializers
 class RecipeViewSet(viewsets.ModelViewSet):
     """View for manage recipe APIs."""
     serializer_class = serializers.RecipeDetailSerializer
+    # serializers for actions that don't use the detail serializer,
+    # list() builds its response from values() so RecipeSerializer only
+    # describes that response in the schema and formats its price
+    action_serializer_map = {
+        'list': serializers.RecipeSerializer,
+        'upload_image': serializers.RecipeImageSerializer,
+    }
     # objects available for this viewset
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    _cached_qs = None
 
     def _params_to_ints(self, qs):
         """Convert a list of strings to integers."""
         # 1,2,3 -> iterate each integer separated by commas
-        return [int(str_id) for str_id in qs.split(',')]
+        # filter(None, ...) skips empty segments such as in '1,,2,'
+        try:
+            return tuple(map(int, filter(None, qs.split(','))))
+        except ValueError:
+            raise ParseError(f'Invalid list of IDs: {qs}')
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
+        # a viewset instance only serves one request, so build the
+        # queryset (and parse the filter params) once and reuse it
+        # for every call DRF makes while handling that request
+        if self._cached_qs is None:
+            self._cached_qs = self._build_queryset()
+
+        return self._cached_qs
+
+    def _build_queryset(self):
+        """Build the recipes queryset for the request."""
         # retrieving query params called tags and ingredients
         # result will be a comma separated list provided as a string
         tags = self.request.query_params.get('tags')
@@ -66,21 +96,94 @@ class RecipeViewSet(viewsets.ModelViewSet):
         # allow to apply filters to the query set
         # and return the resulting filtered output
         queryset = self.queryset
-        if tags:
-            tag_ids = self._params_to_ints(tags)
+        # a value with only empty segments (e.g. ',') means no filter
+        tag_ids = self._params_to_ints(tags) if tags else ()
+        ingredient_ids = (
+            self._params_to_ints(ingredients) if ingredients else ()
+        )
+        if tag_ids:
             # filter out tags by ID if any IDs in the list of tag we have
-            queryset = queryset.filter(tags__id__in=tag_ids)
-        if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            # EXISTS instead of a join so recipes that has multiple
+            # matching tags aren't returned duplicate times
+            queryset = queryset.filter(Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe_id=OuterRef('pk'),
+                    tag_id__in=tag_ids,
+                )
+            ))
+        if ingredient_ids:
+            queryset = queryset.filter(Exists(
+                Recipe.ingredients.through.objects.filter(
+                    recipe_id=OuterRef('pk'),
+                    ingredient_id__in=ingredient_ids,
+                )
+            ))
 
         # filter only recipes of the user assigned to the request
-        # distinct() because recipes that has
-        # multiple tags can be queried duplicate times when querying
-        # multiple tags at the same time
-        return queryset.filter(
+        queryset = queryset.filter(
             user=self.request.user
-        ).order_by('-id').distinct()
+        ).order_by('-id')
+
+        # the detail response renders the nested tags and ingredients,
+        # so prefetch them in one query each instead of one per relation
+        # (list() loads its own tags and ingredients)
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('tags', 'ingredients')
+
+        return queryset
+
+    def _related_by_recipe(self, through, field, recipe_ids):
+        """Map recipe IDs to the related objects linked through a table."""
+        related = defaultdict(list)
+        # one query joining the through table with the related names
+        rows = through.objects.filter(
+            recipe_id__in=recipe_ids,
+        ).order_by('id').values_list(
+            'recipe_id', f'{field}_id', f'{field}__name',
+        )
+        for recipe_id, related_id, name in rows:
+            related[recipe_id].append({'id': related_id, 'name': name})
+
+        return related
+
+    # override list so the recipes are built from plain values instead of
+    # running every row through the ModelSerializer and its nested
+    # serializers, which dominates the cost of large lists
+    def list(self, request, *args, **kwargs):
+        """List recipes for authenticated user."""
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*RECIPE_LIST_FIELDS)
+
+        page = self.paginate_queryset(queryset)
+        recipes = list(queryset if page is None else page)
+
+        recipe_ids = [recipe['id'] for recipe in recipes]
+        tags = {}
+        ingredients = {}
+        if recipe_ids:
+            tags = self._related_by_recipe(
+                Recipe.tags.through, 'tag', recipe_ids,
+            )
+            ingredients = self._related_by_recipe(
+                Recipe.ingredients.through, 'ingredient', recipe_ids,
+            )
+
+        # render the price the same way the serializer DecimalField does
+        price_field = self.get_serializer().fields['price']
+        data = [
+            {
+                **recipe,
+                'price': price_field.to_representation(recipe['price']),
+                'tags': tags.get(recipe['id'], []),
+                'ingredients': ingredients.get(recipe['id'], []),
+            }
+            for recipe in recipes
+        ]
+
+        if page is not None:
+            return self.get_paginated_response(data)
+
+        return Response(data)
 
     # the method get called when RDF wants to determine the class
     # that's being used for a particular action
@@ -90,12 +193,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
     # one that's configured the list view
     def get_serializer_class(self):
         """Return the serializer class for request."""
-        if self.action == 'list':
-            return serializers.RecipeSerializer
-        elif self.action == 'upload_image':
-            return serializers.RecipeImageSerializer
-
-        return self.serializer_class
+        return self.action_serializer_map.get(
+            self.action,
+            self.serializer_class,
+        )
 
     # overwrite perform_create to assign the user associated with the recipe
     # when we perform a creation of a new object through this model view,
@@ -138,7 +239,7 @@ class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
     """Base viewset for recipe attributes."""
     # add support for token authentication and the
     # only authentication for this viewset
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     # all the user must be authenticated to use this endpoint
     permission_classes = [IsAuthenticated]
 
@@ -146,20 +247,39 @@ class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
     # and make changes to their own ingredients
     def get_queryset(self):
         """Filter queryset to authenticated user."""
-        # boolean function here to convert the 1 or 0
-        # to true or false, set default value to 0 - false
-        # specify the default is not providing filter
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
+        # compare the raw value instead of converting it to an int,
+        # so a missing or invalid value means not providing filter
+        # instead of raising an error
+        assigned_only = self.request.query_params.get('assigned_only') == '1'
         queryset = self.queryset
         if assigned_only:  # apply additional filter to queryset
-            # filter recipes associated with the value
-            queryset = queryset.filter(recipe__isnull=False)
+            # filter items assigned to at least one recipe, EXISTS on the
+            # recipe through table (e.g. tag_id for tags) instead of a
+            # join so items on many recipes aren't returned duplicate
+            # times and no distinct() is needed
+            model = queryset.model
+            queryset = queryset.filter(Exists(
+                model.recipe_set.through.objects.filter(**{
+                    f'{model._meta.model_name}_id': OuterRef('pk'),
+                })
+            ))
 
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by('-name')
+
+    # the items only have plain columns, so list them straight from
+    # values() instead of running every row through the serializer
+    def list(self, request, *args, **kwargs):
+        """List items for authenticated user."""
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*self.serializer_class.Meta.fields)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(list(page))
+
+        return Response(list(queryset))
 
 
 # leverage viewset based class because the tag utilizes the CURD functionality
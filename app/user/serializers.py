@@ -45,16 +45,15 @@ class UserSerializer(serializers.ModelSerializer):
         # and remove it in the dict after being retrieved
         # don't force the user to have pwd so default to none here
         password = validated_data.pop('password', None)
+        # hash the password before the base update so its single
+        # save writes it together with the other fields
+        if password:
+            instance.set_password(password)
+
         # still keeping some function of the wheel while change only
         # things we need by calling the update
         # function provided by base serializer
-        user = super().update(instance, validated_data)
-
-        if password:
-            user.set_password(password)
-            user.save()
-
-        return user
+        return super().update(instance, validated_data)
 
 
 class AuthTokenSerializer(serializers.Serializer):